@@ -0,0 +1,707 @@
+import argparse
+import copy
+import itertools
+import logging
+import math
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from elasticsearch import ConflictError, NotFoundError
+from elasticsearch_dsl import connections as es_connections
+from flask import Flask
+from flask_restx import Api
+from sqlalchemy import create_engine
+from datasearchtool.models import Base, configure_orm
+from datasearchtool.doctype.common import INNER_DOC_ID
+from datasearchtool.doctype.databasetable import DatabaseTableInputSourceField
+from datasearchtool.common.relationships import INPUT_SOURCE_FIELDS
+from datasearchtool.utils.elastic_search import (
+    create_elastic_search_objects,
+    get_doc_type,
+)
+from datasearchtool.webapp.api.namespaces.input_sources import (
+    DATA_SOURCE_TYPE_ENUM,
+    DATA_SOURCE_TYPE_FIELD_NAME,
+    DATA_SOURCE_NAME_FIELD_NAME,
+)
+from datasearchtool.webapp.api.namespaces import database_table_input_sources
+
+
+NAMESPACE_PATH = "/input-sources"
+
+GET = "GET"
+POST = "POST"
+PUT = "PUT"
+DELETE = "DELETE"
+METHODS = [GET, POST, PUT, DELETE]
+
+DEFAULT_MIX = "GET=60,POST=15,PUT=15,DELETE=10"
+
+PERCENTILES = [50, 95, 99]
+
+# Fields of an input source pointing to the document it reads from
+INPUT_SOURCE_DOC_TYPE_KEY = "doc_type"
+INPUT_SOURCE_DOC_ID_KEY = "doc_id"
+
+# Query clauses matched by the stand-in search, every other clause is ignored
+TERM_QUERIES = ["term", "match", "match_phrase"]
+TERMS_QUERY = "terms"
+IDS_QUERY = "ids"
+
+# Per thread accounting of what happens while serving a single request
+REQUEST_STATS = threading.local()
+
+
+LOG = logging.getLogger(__name__)
+
+
+class InMemoryElasticsearch:
+    """
+    Minimal stand-in for the Elasticsearch client, covering the calls that
+    elasticsearch_dsl documents make (get, index, update, exists, mget and
+    search). It keeps sequence numbers so that concurrent writers get the
+    same version conflicts they would get from a real cluster.
+    Searches only support term, terms, match and ids clauses, and a document
+    is a hit when it matches all of them (bool semantics are not emulated).
+    """
+
+    def __init__(self):
+        self._documents = {}
+        self._seq_no = itertools.count()
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+
+    def _count(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+
+        REQUEST_STATS.es_calls = getattr(REQUEST_STATS, "es_calls", 0) + 1
+
+    def _hit(self, index, id, stored):
+        return {
+            "_index": index,
+            "_id": id,
+            "_version": stored["_version"],
+            "_seq_no": stored["_seq_no"],
+            "_primary_term": 1,
+            "found": True,
+            "_source": copy.deepcopy(stored["_source"]),
+        }
+
+    def _write_result(self, index, id, stored, result):
+        return {
+            "_index": index,
+            "_id": id,
+            "_version": stored["_version"],
+            "_seq_no": stored["_seq_no"],
+            "_primary_term": 1,
+            "result": result,
+        }
+
+    def get(self, index, id, **kwargs):
+        self._count("get")
+
+        with self._lock:
+            stored = self._documents.get((index, id))
+            if stored:
+                return self._hit(index, id, stored)
+
+        if 404 in _as_list(kwargs.get("ignore")):
+            return {"_index": index, "_id": id, "found": False}
+
+        raise NotFoundError(404, "document_missing_exception", {})
+
+    def exists(self, index, id, **kwargs):
+        self._count("exists")
+
+        with self._lock:
+            return (index, id) in self._documents
+
+    def mget(self, body, index=None, **kwargs):
+        self._count("mget")
+
+        docs = []
+        with self._lock:
+            for doc in body.get("docs", []):
+                doc_index = doc.get("_index", index)
+                stored = self._documents.get((doc_index, doc["_id"]))
+                if stored:
+                    docs.append(self._hit(doc_index, doc["_id"], stored))
+                else:
+                    docs.append(
+                        {"_index": doc_index, "_id": doc["_id"], "found": False}
+                    )
+
+        return {"docs": docs}
+
+    def search(self, index=None, body=None, **kwargs):
+        self._count("search")
+
+        body = body or {}
+        indexes = set(index.split(",")) if isinstance(index, str) else None
+        clauses = _collect_term_clauses(body.get("query", {}))
+        size = body.get("size", kwargs.get("size", 10))
+
+        hits = []
+        with self._lock:
+            for (document_index, document_id), stored in self._documents.items():
+                if indexes and document_index not in indexes:
+                    continue
+
+                source = stored["_source"]
+                if all(
+                    _matches(document_id, source, field, values)
+                    for field, values in clauses
+                ):
+                    hits.append(self._hit(document_index, document_id, stored))
+
+        return {
+            "took": 0,
+            "timed_out": False,
+            "hits": {
+                "total": {"value": len(hits), "relation": "eq"},
+                "max_score": 1.0 if hits else None,
+                "hits": [dict(hit, _score=1.0) for hit in hits[:size]],
+            },
+        }
+
+    def index(self, index, body=None, id=None, document=None, **kwargs):
+        self._count("index")
+
+        with self._lock:
+            previous = self._documents.get((index, id))
+
+            if previous and kwargs.get("op_type") == "create":
+                raise ConflictError(409, "version_conflict_engine_exception", {})
+
+            self._check_seq_no(previous, kwargs)
+
+            stored = {
+                "_source": copy.deepcopy(document if body is None else body),
+                "_seq_no": next(self._seq_no),
+                "_version": previous["_version"] + 1 if previous else 1,
+            }
+            self._documents[(index, id)] = stored
+
+            result = "updated" if previous else "created"
+            return self._write_result(index, id, stored, result)
+
+    def update(self, index, id, body=None, doc=None, **kwargs):
+        self._count("update")
+
+        updates = doc if body is None else body.get("doc", {})
+
+        with self._lock:
+            stored = self._documents.get((index, id))
+            if not stored:
+                raise NotFoundError(404, "document_missing_exception", {})
+
+            self._check_seq_no(stored, kwargs)
+
+            stored["_source"].update(copy.deepcopy(updates))
+            stored["_seq_no"] = next(self._seq_no)
+            stored["_version"] += 1
+
+            return self._write_result(index, id, stored, "updated")
+
+    @staticmethod
+    def _check_seq_no(stored, kwargs):
+        if_seq_no = kwargs.get("if_seq_no")
+        if_primary_term = kwargs.get("if_primary_term")
+
+        if if_seq_no is None and if_primary_term is None:
+            return
+
+        if (
+            not stored
+            or (if_seq_no is not None and if_seq_no != stored["_seq_no"])
+            or (if_primary_term is not None and if_primary_term != 1)
+        ):
+            raise ConflictError(409, "version_conflict_engine_exception", {})
+
+    def get_source(self, index, id):
+        """
+        Reads a stored document without counting it as an Elasticsearch call,
+        so that the workload can pick targets without skewing the report.
+        """
+        with self._lock:
+            stored = self._documents.get((index, id))
+            return copy.deepcopy(stored["_source"]) if stored else None
+
+
+def _as_list(value):
+    if value is None:
+        return []
+
+    if isinstance(value, (list, tuple)):
+        return list(value)
+
+    return [value]
+
+
+def _collect_term_clauses(query):
+    clauses = []
+
+    if isinstance(query, list):
+        for item in query:
+            clauses.extend(_collect_term_clauses(item))
+        return clauses
+
+    if not isinstance(query, dict):
+        return clauses
+
+    for key, value in query.items():
+        if key in TERM_QUERIES:
+            field, term = next(iter(value.items()))
+            if isinstance(term, dict):
+                term = term.get("value", term.get("query"))
+            clauses.append((field, [term]))
+        elif key == TERMS_QUERY:
+            field, terms = next(iter(value.items()))
+            clauses.append((field, list(terms)))
+        elif key == IDS_QUERY:
+            clauses.append(("_id", list(value.get("values", []))))
+        else:
+            clauses.extend(_collect_term_clauses(value))
+
+    return clauses
+
+
+def _matches(document_id, source, field, values):
+    if field == "_id":
+        return document_id in values
+
+    if field.endswith(".keyword"):
+        field = field[: -len(".keyword")]
+
+    found = [source]
+    for part in field.split("."):
+        next_found = []
+        for value in found:
+            value = value if isinstance(value, list) else [value]
+            next_found.extend(
+                item[part] for item in value if isinstance(item, dict) and part in item
+            )
+        found = next_found
+
+    flattened = []
+    for value in found:
+        flattened.extend(value if isinstance(value, list) else [value])
+
+    return any(value in values for value in flattened)
+
+
+def timed_handle_relationships(handle_relationships):
+    def wrapper(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return handle_relationships(*args, **kwargs)
+        finally:
+            REQUEST_STATS.relationships_time = getattr(
+                REQUEST_STATS, "relationships_time", 0
+            ) + (time.perf_counter() - started_at)
+
+    return wrapper
+
+
+def build_app():
+    app = Flask(__name__)
+    # Failed requests are part of the report, they must not stop the run
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+
+    api = Api(app)
+    api.add_namespace(database_table_input_sources.get_namespace(), NAMESPACE_PATH)
+
+    return app
+
+
+def build_input_source(name, index, related_document_id):
+    return {
+        DATA_SOURCE_TYPE_FIELD_NAME: DATA_SOURCE_TYPE_ENUM[0],
+        DATA_SOURCE_NAME_FIELD_NAME: name,
+        INPUT_SOURCE_DOC_TYPE_KEY: index,
+        INPUT_SOURCE_DOC_ID_KEY: related_document_id,
+    }
+
+
+def seed_related_documents(doc_type, related_documents_count):
+    """
+    Seeds the documents the input sources read from, so that
+    handle_relationships has related documents to load and update.
+    """
+    LOG.info(
+        "Seeding %s related '%s' documents",
+        related_documents_count,
+        doc_type.Index.name,
+    )
+
+    related_documents_ids = []
+
+    for document_number in range(related_documents_count):
+        document_id = f"benchmark_related_table_{document_number}"
+
+        document = doc_type(meta={"id": document_id}, **{INPUT_SOURCE_FIELDS: []})
+        document.save()
+
+        related_documents_ids.append(document_id)
+
+    return related_documents_ids
+
+
+def seed_documents(doc_type, documents_count, input_sources_count, related_ids):
+    LOG.info(
+        "Seeding %s '%s' documents with %s input sources each",
+        documents_count,
+        doc_type.Index.name,
+        input_sources_count,
+    )
+
+    documents_ids = []
+
+    for document_number in range(documents_count):
+        document_id = f"benchmark_table_{document_number}"
+
+        input_sources = create_elastic_search_objects(
+            DatabaseTableInputSourceField,
+            [
+                build_input_source(
+                    f"benchmark.source_{number}",
+                    doc_type.Index.name,
+                    related_ids[number % len(related_ids)],
+                )
+                for number in range(input_sources_count)
+            ],
+        )
+
+        document = doc_type(
+            meta={"id": document_id}, **{INPUT_SOURCE_FIELDS: input_sources}
+        )
+        document.save()
+
+        documents_ids.append(document_id)
+
+    return documents_ids
+
+
+def parse_mix(mix):
+    weights = {}
+
+    for entry in mix.split(","):
+        method, separator, weight = entry.partition("=")
+        method = method.strip().upper()
+
+        if not separator:
+            raise ValueError(f"Expected METHOD=WEIGHT in workload mix, got '{entry}'")
+
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}' in workload mix")
+
+        try:
+            weights[method] = int(weight)
+        except ValueError:
+            raise ValueError(
+                f"Invalid weight '{weight}' for '{method}' in workload mix"
+            ) from None
+
+        if weights[method] < 0:
+            raise ValueError(f"Negative weight for '{method}' in workload mix")
+
+    if not any(weights.values()):
+        raise ValueError("At least one method of the workload mix needs a weight")
+
+    return weights
+
+
+def pick_input_source_id(es, rng, index, document_id):
+    source = es.get_source(index, document_id) or {}
+    input_sources = source.get(INPUT_SOURCE_FIELDS) or []
+
+    if not input_sources:
+        return None
+
+    return rng.choice(input_sources).get(INNER_DOC_ID)
+
+
+def build_request(es, rng, method, index, document_id, related_ids, sequence):
+    document_url = f"{NAMESPACE_PATH}/{index}/{document_id}"
+
+    if method in (PUT, DELETE):
+        input_source_id = pick_input_source_id(es, rng, index, document_id)
+
+        # Every input source of the document has been deleted meanwhile
+        if input_source_id is None:
+            method = POST
+
+    if method == GET:
+        return method, document_url, None
+
+    if method == POST:
+        return (
+            method,
+            document_url,
+            build_input_source(
+                f"benchmark.created_{sequence}", index, rng.choice(related_ids)
+            ),
+        )
+
+    input_source_url = f"{document_url}/{input_source_id}"
+
+    if method == PUT:
+        return (
+            method,
+            input_source_url,
+            build_input_source(
+                f"benchmark.updated_{sequence}", index, rng.choice(related_ids)
+            ),
+        )
+
+    return method, input_source_url, None
+
+
+def run_worker(
+    app, es, rng, index, documents_ids, related_ids, weights, requests_count, samples
+):
+    client = app.test_client()
+
+    methods = list(weights.keys())
+    method_weights = list(weights.values())
+
+    for sequence in range(requests_count):
+        method = rng.choices(methods, method_weights)[0]
+        document_id = rng.choice(documents_ids)
+
+        # Picking the target reads the stand-in, it is kept out of the timing
+        method, url, payload = build_request(
+            es, rng, method, index, document_id, related_ids, sequence
+        )
+
+        REQUEST_STATS.es_calls = 0
+        REQUEST_STATS.relationships_time = 0
+
+        started_at = time.perf_counter()
+        response = client.open(url, method=method, json=payload)
+        elapsed = time.perf_counter() - started_at
+
+        samples.append(
+            (
+                method,
+                response.status_code,
+                elapsed,
+                REQUEST_STATS.es_calls,
+                REQUEST_STATS.relationships_time,
+            )
+        )
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+
+    rank = math.ceil(percent / 100 * len(sorted_values))
+
+    return sorted_values[max(rank, 1) - 1]
+
+
+def is_successful(status_code):
+    return 200 <= status_code < 300
+
+
+def report(samples, wall_time):
+    """
+    Latencies, throughput, Elasticsearch calls and handle_relationships time
+    only account for successful responses, failures are reported by status.
+    Returns the number of server errors.
+    """
+    successful = [sample for sample in samples if is_successful(sample[1])]
+    server_errors = sum(1 for sample in samples if sample[1] >= 500)
+
+    LOG.info(
+        "%s requests in %.2fs, %s successful (%.1f successful requests/sec)",
+        len(samples),
+        wall_time,
+        len(successful),
+        len(successful) / wall_time if wall_time else 0,
+    )
+
+    by_method = defaultdict(list)
+    for sample in samples:
+        by_method[sample[0]].append(sample)
+
+    for method, method_samples in [("ALL", samples)] + sorted(by_method.items()):
+        statuses = defaultdict(int)
+        for sample in method_samples:
+            statuses[sample[1]] += 1
+
+        method_successful = [
+            sample for sample in method_samples if is_successful(sample[1])
+        ]
+
+        if not method_successful:
+            LOG.info(
+                "%-6s n=%-6s no successful responses | statuses %s",
+                method,
+                len(method_samples),
+                dict(sorted(statuses.items())),
+            )
+            continue
+
+        latencies = sorted(sample[2] for sample in method_successful)
+
+        LOG.info(
+            "%-6s ok=%-6s %s | ES calls/request %.2f | handle_relationships "
+            "%.2fms/request | statuses %s",
+            method,
+            len(method_successful),
+            " ".join(
+                f"p{percent}={percentile(latencies, percent) * 1000:.2f}ms"
+                for percent in PERCENTILES
+            ),
+            sum(sample[3] for sample in method_successful) / len(method_successful),
+            sum(sample[4] for sample in method_successful)
+            / len(method_successful)
+            * 1000,
+            dict(sorted(statuses.items())),
+        )
+
+    if server_errors:
+        LOG.warning("%s requests failed with a server error", server_errors)
+
+    return server_errors
+
+
+def run(opts, sql_connection_string, create_schema):
+    es = InMemoryElasticsearch()
+    es_connections.add_connection("default", es)
+
+    LOG.info("Using SQL database '%s'", sql_connection_string)
+    configure_orm(connection_string=sql_connection_string)
+
+    if create_schema:
+        Base.metadata.create_all(create_engine(sql_connection_string))
+
+    database_table_input_sources.handle_relationships = timed_handle_relationships(
+        database_table_input_sources.handle_relationships
+    )
+
+    app = build_app()
+
+    index = opts.doc_type
+    if not index:
+        index = database_table_input_sources.get_database_table_indexes()[0]
+
+    doc_type = get_doc_type(index)
+    related_ids = seed_related_documents(doc_type, opts.related_documents)
+    documents_ids = seed_documents(
+        doc_type, opts.documents, opts.input_sources, related_ids
+    )
+
+    weights = parse_mix(opts.mix)
+
+    # list.append is atomic, the workers can share the samples list
+    samples = []
+    workers = [
+        threading.Thread(
+            target=run_worker,
+            args=(
+                app,
+                es,
+                random.Random(opts.seed + worker_number),
+                index,
+                documents_ids,
+                related_ids,
+                weights,
+                opts.requests,
+                samples,
+            ),
+        )
+        for worker_number in range(opts.workers)
+    ]
+
+    LOG.info(
+        "Running %s workers x %s requests (%s) against '%s'",
+        opts.workers,
+        opts.requests,
+        opts.mix,
+        index,
+    )
+
+    started_at = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall_time = time.perf_counter() - started_at
+
+    server_errors = report(samples, wall_time)
+    LOG.info("Elasticsearch calls by operation: %s", dict(es.calls))
+
+    return server_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test for the database table input sources endpoints"
+    )
+    parser.add_argument("--doc-type", help="Index of the documents to exercise")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument(
+        "--input-sources",
+        type=int,
+        default=20,
+        help="Number of input sources seeded on each document",
+    )
+    parser.add_argument(
+        "--related-documents",
+        type=int,
+        default=10,
+        help="Number of documents the input sources read from",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--requests", type=int, default=250, help="Number of requests per worker"
+    )
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Worker N uses the seed SEED + N"
+    )
+    parser.add_argument(
+        "--sql-connection-string",
+        help="Database with an existing schema. Defaults to a SQLite database "
+        "created for the run and removed at the end of it",
+    )
+
+    opts = parser.parse_args()
+
+    for option in ["documents", "related_documents", "workers", "requests"]:
+        if getattr(opts, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+
+    if opts.input_sources < 0:
+        parser.error("--input-sources cannot be negative")
+
+    try:
+        parse_mix(opts.mix)
+    except ValueError as error:
+        parser.error(str(error))
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if opts.sql_connection_string:
+        server_errors = run(opts, opts.sql_connection_string, create_schema=False)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            server_errors = run(
+                opts,
+                f"sqlite:///{directory}/benchmark_input_sources.db",
+                create_schema=True,
+            )
+
+    if server_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
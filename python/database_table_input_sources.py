@@ -1,3 +1,7 @@
+import logging
+import time
+from collections import namedtuple
+from functools import lru_cache
 from flask_restx import Namespace, Model
 from flask_restx.fields import String, List, Nested
 from datasearchtool.models import provide_session
@@ -34,46 +38,20 @@ from datasearchtool.webapp.api.namespaces.input_sources import (
 )
 
 
-BaseInputSourceModel = build_doc_type_spec(DatabaseTableInputSourceField)
+LOG = logging.getLogger(__name__)
 
-InputSourceModel = Model.clone(
-    "DatabaseTableInputSourceModel",
-    BaseInputSourceModel,
-    {
-        DATA_SOURCE_TYPE_FIELD_NAME: String(enum=DATA_SOURCE_TYPE_ENUM, required=True),
-        DATA_SOURCE_NAME_FIELD_NAME: String(required=True),
-    },
-)
-
-CompleteInputSourceModel = Model.clone(
-    "DatabaseTableCompleteInputSourceModel", InputSourceModel, {DOC_NAME: String(),},
-)
 
-InputSourceEditionModel = Model(
-    "DatabaseTableInputSourceEditionModel",
-    {INPUT_SOURCE_FIELDS: List(Nested(InputSourceModel))},
+InputSourceModels = namedtuple(
+    "InputSourceModels",
+    [
+        "BaseInputSourceModel",
+        "InputSourceModel",
+        "CompleteInputSourceModel",
+        "InputSourceEditionModel",
+        "CompleteInputSourcesListModel",
+    ],
 )
 
-CompleteInputSourcesListModel = Model(
-    "DatabaseTableCompleteInputSourcesListModel",
-    {INPUT_SOURCE_FIELDS: List(Nested(CompleteInputSourceModel))},
-)
-
-
-MODELS = [
-    BaseInputSourceModel,
-    InputSourceModel,
-    CompleteInputSourceModel,
-    InputSourceEditionModel,
-    CompleteInputSourcesListModel,
-]
-
-
-namespace = Namespace("Database Table Input Sources")
-
-
-add_models_to_namespace(MODELS, namespace)
-
 
 DOC_TYPE_PARAMETER = "doc_type"
 DOC_ID_PARAMETER = "doc_id"
@@ -84,11 +62,21 @@ ROUTE_TEMPLATE = f"/{{{ROUTE_TEMPLATE_DOC_TYPE_PARAMETER}}}/<{DOC_ID_PARAMETER}>
 INPUT_SOURCE_IDENTIFIER_PARAMETER = "input_source_identifier"
 
 
-DATABASE_TABLE_INDEXES = [
-    doc_type.Index.name for doc_type in get_database_table_doc_types()
+# Use get_namespace(), the routes are only registered there
+_namespace = Namespace("Database Table Input Sources")
+
+# Built by build_resources(), served by the module __getattr__
+RESOURCES_NAMES = [
+    "DatabaseTableInputSourceResource",
+    "DatabaseTableInputSourcesResource",
 ]
 
 
+@lru_cache(maxsize=None)
+def get_database_table_indexes():
+    return tuple(doc_type.Index.name for doc_type in get_database_table_doc_types())
+
+
 def build_route(indexes):
     any_of_indexes = ",".join(indexes)
 
@@ -101,157 +89,211 @@ def build_route(indexes):
     return route
 
 
-@namespace.route(
-    f"{build_route(DATABASE_TABLE_INDEXES)}/<{INPUT_SOURCE_IDENTIFIER_PARAMETER}>"
-)
-@namespace.response(404, "The document does not exist")
-class DatabaseTableInputSourceResource(InputSourceResource):
-    @staticmethod
-    def extract_parameters(parameters):
-        index = parameters.pop(DOC_TYPE_PARAMETER)
-        doc_id = parameters.pop(DOC_ID_PARAMETER)
-        input_source_id = parameters.pop(INPUT_SOURCE_IDENTIFIER_PARAMETER)
-        return index, doc_id, input_source_id
-
-    @namespace.response(
-        200, "Read a specific input source", CompleteInputSourceModel,
-    )
-    def get(self, **kwargs):
-        (
-            index,
-            doc_id,
-            input_source_id,
-        ) = DatabaseTableInputSourceResource.extract_parameters(kwargs)
-
-        doc_type = get_doc_type(index)
-        document = get_document_or_raise(doc_type, doc_id)
-
-        return self._do_get_input_source(document, INPUT_SOURCE_FIELDS, input_source_id)
-
-    @namespace.expect(InputSourceModel, validate=True)
-    @takes_input_model(InputSourceModel, skip_none=True)
-    @namespace.response(
-        200, "The document has been successfully updated", CompleteInputSourceModel,
-    )
-    @provide_session
-    def put(self, session, **kwargs):
-        (
-            index,
-            doc_id,
-            input_source_id,
-        ) = DatabaseTableInputSourceResource.extract_parameters(kwargs)
-
-        doc_type = get_doc_type(index)
-        document = get_document_or_raise(doc_type, doc_id)
-
-        return self._do_put(
-            doc_type, document.meta.id, document, input_source_id, kwargs, session,
-        )
-
-    def _do_put(
-        self, doc_type, document_id, document, input_source_id, fields, session
-    ):
-        updated_input_sources = InputSourceResource.update_input_source_on_list(
-            document, input_source_id, fields, INPUT_SOURCE_FIELDS
-        )
-
-        updated_document = update_input_source_fields(
-            doc_type, document_id, document, updated_input_sources, session
-        )
-
-        input_source = InputSourceResource.get_input_source_or_raise(
-            updated_document, input_source_id, INPUT_SOURCE_FIELDS
-        )
+@lru_cache(maxsize=None)
+def build_models():
+    base_input_source_model = build_doc_type_spec(DatabaseTableInputSourceField)
 
-        serialized = input_source.to_dict()
+    input_source_model = Model.clone(
+        "DatabaseTableInputSourceModel",
+        base_input_source_model,
+        {
+            DATA_SOURCE_TYPE_FIELD_NAME: String(
+                enum=DATA_SOURCE_TYPE_ENUM, required=True
+            ),
+            DATA_SOURCE_NAME_FIELD_NAME: String(required=True),
+        },
+    )
 
-        InputSourceResource.add_additional_properties_to_input_source(serialized)
+    complete_input_source_model = Model.clone(
+        "DatabaseTableCompleteInputSourceModel",
+        input_source_model,
+        {DOC_NAME: String(),},
+    )
 
-        return serialized, 200
+    input_source_edition_model = Model(
+        "DatabaseTableInputSourceEditionModel",
+        {INPUT_SOURCE_FIELDS: List(Nested(input_source_model))},
+    )
 
-    @namespace.doc(description="Delete an input source from a document")
-    @namespace.response(204, "Input source successfully deleted")
-    @provide_session
-    def delete(self, session, **kwargs):
-        (
-            index,
-            doc_id,
-            input_source_id,
-        ) = DatabaseTableInputSourceResource.extract_parameters(kwargs)
+    complete_input_sources_list_model = Model(
+        "DatabaseTableCompleteInputSourcesListModel",
+        {INPUT_SOURCE_FIELDS: List(Nested(complete_input_source_model))},
+    )
 
-        doc_type = get_doc_type(index)
-        document = get_document_or_raise(doc_type, doc_id)
+    return InputSourceModels(
+        base_input_source_model,
+        input_source_model,
+        complete_input_source_model,
+        input_source_edition_model,
+        complete_input_sources_list_model,
+    )
 
-        return self._do_delete(doc_type, doc_id, document, input_source_id, session)
 
-    def _do_delete(self, doc_type, doc_id, document, input_source_id, session):
-        input_source_identifiers = parse_url_multiple_parameter(input_source_id)
+def build_resources(namespace, models):
+    """
+    The resources are built here rather than at module level because their
+    decorators need the models, which are only built with the namespace.
+    """
 
-        input_sources = getattr(document, INPUT_SOURCE_FIELDS)
+    @namespace.response(404, "The document does not exist")
+    class DatabaseTableInputSourceResource(InputSourceResource):
+        @staticmethod
+        def extract_parameters(parameters):
+            index = parameters.pop(DOC_TYPE_PARAMETER)
+            doc_id = parameters.pop(DOC_ID_PARAMETER)
+            input_source_id = parameters.pop(INPUT_SOURCE_IDENTIFIER_PARAMETER)
+            return index, doc_id, input_source_id
 
-        validate_identifiers_exist_in_nested_list(
-            input_sources, INPUT_SOURCE_FIELDS, INNER_DOC_ID, input_source_identifiers
+        @namespace.response(
+            200, "Read a specific input source", models.CompleteInputSourceModel,
         )
-        updates = {
-            INPUT_SOURCE_FIELDS: remove_from_nested_list(
-                input_sources, INNER_DOC_ID, input_source_identifiers
-            ),
-        }
-
-        handle_relationships(document, doc_id, doc_type, session, updates=updates)
-
-        BaseDocType.update_document(document, updates)
-
-        return "", 204
-
+        def get(self, **kwargs):
+            (
+                index,
+                doc_id,
+                input_source_id,
+            ) = DatabaseTableInputSourceResource.extract_parameters(kwargs)
+
+            doc_type = get_doc_type(index)
+            document = get_document_or_raise(doc_type, doc_id)
+
+            return self._do_get_input_source(
+                document, INPUT_SOURCE_FIELDS, input_source_id
+            )
+
+        @namespace.expect(models.InputSourceModel, validate=True)
+        @takes_input_model(models.InputSourceModel, skip_none=True)
+        @namespace.response(
+            200,
+            "The document has been successfully updated",
+            models.CompleteInputSourceModel,
+        )
+        @provide_session
+        def put(self, session, **kwargs):
+            (
+                index,
+                doc_id,
+                input_source_id,
+            ) = DatabaseTableInputSourceResource.extract_parameters(kwargs)
+
+            doc_type = get_doc_type(index)
+            document = get_document_or_raise(doc_type, doc_id)
+
+            return self._do_put(
+                doc_type, document.meta.id, document, input_source_id, kwargs, session,
+            )
+
+        def _do_put(
+            self, doc_type, document_id, document, input_source_id, fields, session
+        ):
+            updated_input_sources = InputSourceResource.update_input_source_on_list(
+                document, input_source_id, fields, INPUT_SOURCE_FIELDS
+            )
+
+            updated_document = update_input_source_fields(
+                doc_type, document_id, document, updated_input_sources, session
+            )
+
+            input_source = InputSourceResource.get_input_source_or_raise(
+                updated_document, input_source_id, INPUT_SOURCE_FIELDS
+            )
+
+            serialized = input_source.to_dict()
+
+            InputSourceResource.add_additional_properties_to_input_source(serialized)
+
+            return serialized, 200
+
+        @namespace.doc(description="Delete an input source from a document")
+        @namespace.response(204, "Input source successfully deleted")
+        @provide_session
+        def delete(self, session, **kwargs):
+            (
+                index,
+                doc_id,
+                input_source_id,
+            ) = DatabaseTableInputSourceResource.extract_parameters(kwargs)
+
+            doc_type = get_doc_type(index)
+            document = get_document_or_raise(doc_type, doc_id)
+
+            return self._do_delete(doc_type, doc_id, document, input_source_id, session)
+
+        def _do_delete(self, doc_type, doc_id, document, input_source_id, session):
+            input_source_identifiers = parse_url_multiple_parameter(input_source_id)
+
+            input_sources = getattr(document, INPUT_SOURCE_FIELDS)
+
+            validate_identifiers_exist_in_nested_list(
+                input_sources,
+                INPUT_SOURCE_FIELDS,
+                INNER_DOC_ID,
+                input_source_identifiers,
+            )
+            updates = {
+                INPUT_SOURCE_FIELDS: remove_from_nested_list(
+                    input_sources, INNER_DOC_ID, input_source_identifiers
+                ),
+            }
+
+            handle_relationships(document, doc_id, doc_type, session, updates=updates)
+
+            BaseDocType.update_document(document, updates)
+
+            return "", 204
+
+    @namespace.response(404, "No document exists with the provided identifier")
+    class DatabaseTableInputSourcesResource(InputSourceResource):
+        @namespace.response(
+            200, "List of input sources", models.CompleteInputSourcesListModel,
+        )
+        def get(self, **kwargs):
+            index = kwargs.pop(DOC_TYPE_PARAMETER)
+            doc_id = kwargs.pop(DOC_ID_PARAMETER)
 
-@namespace.route(build_route(DATABASE_TABLE_INDEXES))
-@namespace.response(404, "No document exists with the provided identifier")
-class DatabaseTableInputSourcesResource(InputSourceResource):
-    @namespace.response(
-        200, "List of input sources", CompleteInputSourcesListModel,
-    )
-    def get(self, **kwargs):
-        index = kwargs.pop(DOC_TYPE_PARAMETER)
-        doc_id = kwargs.pop(DOC_ID_PARAMETER)
+            doc_type = get_doc_type(index)
+            document = get_document_or_raise(doc_type, doc_id)
 
-        doc_type = get_doc_type(index)
-        document = get_document_or_raise(doc_type, doc_id)
+            return self._return_input_sources_list(document, INPUT_SOURCE_FIELDS)
 
-        return self._return_input_sources_list(document, INPUT_SOURCE_FIELDS)
+        @namespace.expect(models.InputSourceModel, validate=True)
+        @takes_input_model(models.InputSourceModel, skip_none=True)
+        @namespace.response(
+            201,
+            "The input source has been successfully created",
+            models.CompleteInputSourceModel,
+        )
+        @provide_session
+        def post(self, session, **kwargs):
+            index = kwargs.pop(DOC_TYPE_PARAMETER)
+            doc_id = kwargs.pop(DOC_ID_PARAMETER)
 
-    @namespace.expect(InputSourceModel, validate=True)
-    @takes_input_model(InputSourceModel, skip_none=True)
-    @namespace.response(
-        201, "The input source has been successfully created", CompleteInputSourceModel,
-    )
-    @provide_session
-    def post(self, session, **kwargs):
-        index = kwargs.pop(DOC_TYPE_PARAMETER)
-        doc_id = kwargs.pop(DOC_ID_PARAMETER)
+            doc_type = get_doc_type(index)
+            document = get_document_or_raise(doc_type, doc_id)
 
-        doc_type = get_doc_type(index)
-        document = get_document_or_raise(doc_type, doc_id)
+            return self._do_post(doc_type, document.meta.id, document, kwargs, session)
 
-        return self._do_post(doc_type, document.meta.id, document, kwargs, session)
+        def _do_post(self, doc_type, document_id, document, fields, session):
+            current_input_sources = getattr(document, INPUT_SOURCE_FIELDS)
+            updated_input_sources = get_elastic_search_objects_dicts(
+                current_input_sources
+            )
 
-    def _do_post(self, doc_type, document_id, document, fields, session):
-        current_input_sources = getattr(document, INPUT_SOURCE_FIELDS)
-        updated_input_sources = get_elastic_search_objects_dicts(current_input_sources)
+            input_source = DatabaseTableInputSourceField(**fields)
+            serialized_input_source = input_source.to_dict()
+            updated_input_sources.append(serialized_input_source)
 
-        input_source = DatabaseTableInputSourceField(**fields)
-        serialized_input_source = input_source.to_dict()
-        updated_input_sources.append(serialized_input_source)
+            update_input_source_fields(
+                doc_type, document_id, document, updated_input_sources, session
+            )
 
-        update_input_source_fields(
-            doc_type, document_id, document, updated_input_sources, session
-        )
+            InputSourceResource.add_additional_properties_to_input_source(
+                serialized_input_source
+            )
 
-        InputSourceResource.add_additional_properties_to_input_source(
-            serialized_input_source
-        )
+            return serialized_input_source, 201
 
-        return serialized_input_source, 201
+    return DatabaseTableInputSourceResource, DatabaseTableInputSourcesResource
 
 
 def update_input_source_fields(
@@ -268,3 +310,71 @@ def update_input_source_fields(
     BaseDocType.update_document(document, updates)
 
     return document
+
+
+@lru_cache(maxsize=None)
+def get_namespace():
+    """
+    Builds the models, the resources and the routes of the namespace the first
+    time it is requested. Processes that import this module without mounting
+    the API (CLI, daemons) never pay for them; the process that mounts it pays
+    once, when the app is built.
+
+    Only the work done here is reported. The import time of this module
+    depends on what was imported before it, use `python -X importtime` to
+    measure it.
+    """
+    started_at = time.perf_counter()
+    models = build_models()
+    add_models_to_namespace(list(models), _namespace)
+    models_duration = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    indexes = get_database_table_indexes()
+    discovery_duration = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    input_source_resource, input_sources_resource = build_resources(
+        _namespace, models
+    )
+    route = build_route(indexes)
+    _namespace.add_resource(input_sources_resource, route)
+    _namespace.add_resource(
+        input_source_resource, f"{route}/<{INPUT_SOURCE_IDENTIFIER_PARAMETER}>",
+    )
+    registration_duration = time.perf_counter() - started_at
+
+    LOG.info(
+        "Namespace '%s': models %.3fs, doc type discovery %.3fs, "
+        "route registration %.3fs",
+        _namespace.name,
+        models_duration,
+        discovery_duration,
+        registration_duration,
+    )
+
+    return _namespace
+
+
+def __getattr__(name):
+    # Kept for the callers that used the module level namespace, resources,
+    # constants and models before they were built lazily. Accessing them
+    # builds the namespace.
+    if name == "namespace":
+        return get_namespace()
+
+    if name in RESOURCES_NAMES:
+        for resource_route in get_namespace().resources:
+            if resource_route.resource.__name__ == name:
+                return resource_route.resource
+
+    if name == "DATABASE_TABLE_INDEXES":
+        return list(get_database_table_indexes())
+
+    if name == "MODELS":
+        return list(build_models())
+
+    if name in InputSourceModels._fields:
+        return getattr(build_models(), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")